@@ -1,3 +1,6 @@
+import csv
+import gzip
+import hashlib
 import json
 import re
 import time
@@ -5,7 +8,10 @@ import os
 import pandas as pd
 import random
 import logging
+import threading
 import urllib.parse
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -15,13 +21,46 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException, TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 
+try:
+    import orjson  # Faster checkpoint (de)serialization when installed
+except ImportError:
+    orjson = None
+
 # === CONFIGURATION ===
-MIN_DELAY = 5
+MIN_DELAY = 5  # Seconds between Google queries, across all workers
 MAX_DELAY = 8
-CHECKPOINT_FILE = "emails_result.json"
+CHECKPOINT_FILE = "emails_result.jsonl"  # One {"location", "emails"} record per line
+LEGACY_CHECKPOINT_FILE = "emails_result.json"  # Older JSON dict checkpoint, converted once if present
 CSV_OUTPUT_FILE = "emails_output.csv"
 LOCATIONS_COLUMN = "Location"  # Excel column name for USA locations (adjust as needed)
 MAX_RETRIES = 3
+GOOGLE_SEARCH_URL = "https://www.google.com/search?"
+QUERY_TEMPLATE = 'from:construction inurl:contact "{}" email'
+CAPTCHA_TIMEOUT = 10  # Max wait for Buster to solve a CAPTCHA
+POLL_INTERVAL = 0.25  # How often browser waits re-check their condition
+CACHE_DIR = "cache"  # Gzipped results pages keyed by SHA-1 of the URL
+CACHE_TTL = 7 * 24 * 3600  # Seconds before a cached page is fetched again
+# Persistent profiles reused across driver restarts; a subdirectory per script so they can run side by side
+CHROME_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chrome_profile", "aslocation")
+HTTP_TIMEOUT = 10  # Timeout for plain HTTP fetches of the results page
+HTTP_WORKERS = 8  # Concurrent HTTP fetches of results pages
+BROWSER_WORKERS = 2  # Browsers scraping the locations Google blocked over HTTP
+USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:131.0) Gecko/20100101 Firefox/131.0"
+)
+# Matches start at the beginning of a local-part run and domain labels exclude the dot, keeping the scan linear
+EMAIL_RE = re.compile(
+    r'(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@(?:[A-Za-z0-9-]+\.)+[A-Za-z]{2,24}\b',
+    re.IGNORECASE
+)
+# Returns only the organic results subtree; falls back to the whole document (e.g. a CAPTCHA page)
+SEARCH_RESULTS_JS = (
+    "const results = document.querySelector('#search');"
+    "return results ? results.innerHTML : document.documentElement.outerHTML;"
+)
+IMAGE_EXTENSIONS = frozenset(("png", "jpg", "jpeg", "gif", "bmp"))  # Asset names like logo@2x.png that look like emails
 
 # Setup logging
 logging.basicConfig(
@@ -33,6 +72,17 @@ logging.basicConfig(
     ]
 )
 
+# Shared HTTP session so results-page fetches reuse pooled connections
+http_session = requests.Session()
+
+# Browser workers start their drivers one at a time, so a first run never downloads the driver twice at once
+driver_setup_lock = threading.Lock()
+DRIVER_PATH = None  # Resolved by the first driver setup and reused by every restart
+
+# Google query pacing shared by all worker threads: the earliest time the next query may go out
+query_lock = threading.Lock()
+next_query_time = 0.0
+
 def load_locations_from_excel(file_path, column_name=LOCATIONS_COLUMN):
     """
     Load USA locations from the specified column of the Excel file.
@@ -43,8 +93,7 @@ def load_locations_from_excel(file_path, column_name=LOCATIONS_COLUMN):
             logging.error(f"Column '{column_name}' not found in Excel file: {file_path}")
             return []
         locations = df[column_name].dropna().astype(str).str.strip()
-        seen = set()
-        unique_locations = [loc for loc in locations if loc and not (loc in seen or seen.add(loc))]
+        unique_locations = locations[locations.ne("")].drop_duplicates().tolist()
         if not unique_locations:
             logging.error(f"No valid USA locations found in column '{column_name}' of {file_path}")
             return []
@@ -57,52 +106,101 @@ def load_locations_from_excel(file_path, column_name=LOCATIONS_COLUMN):
         logging.error(f"Error loading Excel file {file_path}: {str(e)}")
         return []
 
+def import_legacy_checkpoint(checkpoint_file=CHECKPOINT_FILE, legacy_file=LEGACY_CHECKPOINT_FILE):
+    """
+    Convert the old JSON dict checkpoint into the JSON Lines checkpoint so runs started before the switch resume.
+    Only runs while the JSON Lines file does not exist yet.
+    """
+    if os.path.exists(checkpoint_file) or not os.path.exists(legacy_file):
+        return
+    try:
+        with open(legacy_file, "rb") as f:
+            content = f.read().strip()
+        old_results = (orjson.loads(content) if orjson else json.loads(content)) if content else {}
+        tmp_file = checkpoint_file + ".tmp"
+        with open(tmp_file, "wb") as f:
+            for location, emails in old_results.items():
+                record = {"location": location, "emails": emails}
+                f.write((orjson.dumps(record) if orjson else json.dumps(record).encode("utf-8")) + b"\n")
+        os.replace(tmp_file, checkpoint_file)  # A crash mid-import leaves no partial checkpoint to stop a retry
+        logging.info(f"Imported {len(old_results)} location(s) from {legacy_file} into {checkpoint_file}")
+    except Exception as e:
+        logging.error(f"Error importing old checkpoint {legacy_file}: {str(e)}")
+
+def repair_checkpoint_tail(checkpoint_file=CHECKPOINT_FILE):
+    """
+    Cut a record left unfinished by a crash off the end of the checkpoint file.
+    Otherwise the next append would land on the same line and both records would be unreadable.
+    """
+    with open(checkpoint_file, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return
+        f.seek(0)
+        f.truncate(f.read().rfind(b"\n") + 1)
+    logging.warning(f"Dropped an unfinished record at the end of checkpoint file {checkpoint_file}")
+
 def load_checkpoint(checkpoint_file=CHECKPOINT_FILE):
     """
-    Load existing results from the checkpoint file to resume scraping.
+    Load existing results from the JSON Lines checkpoint file to resume scraping.
+    Later records for the same location win; unreadable lines (e.g. a write cut short by a crash) are skipped.
     """
+    import_legacy_checkpoint(checkpoint_file)
+    email_results = {}
     if os.path.exists(checkpoint_file):
         try:
-            with open(checkpoint_file, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if not content:
-                    logging.info(f"Checkpoint file {checkpoint_file} is empty. Starting fresh.")
-                    return {}
-                return json.loads(content)
-        except json.JSONDecodeError as e:
-            logging.error(f"Corrupted checkpoint file {checkpoint_file}: {e}. Starting fresh.")
-            return {}
+            repair_checkpoint_tail(checkpoint_file)
+            with open(checkpoint_file, "rb") as f:
+                for line_number, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = orjson.loads(line) if orjson else json.loads(line)
+                        email_results[record["location"]] = record["emails"]
+                    except (json.JSONDecodeError, KeyError, TypeError) as e:
+                        logging.error(f"Skipping corrupted line {line_number} in checkpoint file {checkpoint_file}: {e}")
         except Exception as e:
             logging.error(f"Error loading checkpoint file {checkpoint_file}: {e}")
             return {}
-    return {}
+        logging.info(f"Loaded {len(email_results)} processed location(s) from {checkpoint_file}")
+    return email_results
 
-def save_checkpoint(email_results, checkpoint_file=CHECKPOINT_FILE):
+def save_checkpoint(location, emails, checkpoint_file=CHECKPOINT_FILE):
     """
-    Save current results to the checkpoint file.
+    Append the results for one location to the checkpoint file.
     """
     try:
-        with open(checkpoint_file, "w", encoding="utf-8") as f:
-            json.dump(email_results, f, indent=4)
+        record = {"location": location, "emails": emails}
+        line = orjson.dumps(record) if orjson else json.dumps(record).encode("utf-8")
+        with open(checkpoint_file, "ab") as f:
+            f.write(line + b"\n")
         logging.info(f"Checkpoint saved to: {checkpoint_file}")
     except Exception as e:
         logging.error(f"Error saving checkpoint to {checkpoint_file}: {str(e)}")
 
-def export_to_csv(email_results, csv_file=CSV_OUTPUT_FILE):
+def append_to_csv(location, emails, csv_file=CSV_OUTPUT_FILE):
     """
-    Export email results to a CSV file.
+    Append the emails for one location to the CSV file, writing the header if the file is new.
     """
     try:
-        data = [{"Location": loc, "Email": email} for loc, emails in email_results.items() for email in emails]
-        df = pd.DataFrame(data)
-        df.to_csv(csv_file, index=False, encoding="utf-8")
-        logging.info(f"Results exported to: {csv_file}")
+        write_header = not os.path.exists(csv_file) or os.path.getsize(csv_file) == 0
+        with open(csv_file, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if write_header:
+                writer.writerow(["Location", "Email"])
+            writer.writerows((location, email) for email in emails)
+        logging.info(f"Results appended to: {csv_file}")
     except Exception as e:
-        logging.error(f"Error exporting to CSV {csv_file}: {str(e)}")
+        logging.error(f"Error writing to CSV {csv_file}: {str(e)}")
 
-def initialize_driver(extension_path, extension_path2):
+def initialize_driver(extension_path, extension_path2, worker_id=0):
     """
     Initialize the Chrome WebDriver with specified extensions and anti-detection options.
+    Each browser worker gets its own profile, since Chrome locks a profile to a single instance.
     """
     for path in [extension_path, extension_path2]:
         if not os.path.exists(path):
@@ -113,23 +211,23 @@ def initialize_driver(extension_path, extension_path2):
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--start-maximized")
+    chrome_options.add_argument(f"--user-data-dir={os.path.join(CHROME_PROFILE_DIR, f'worker-{worker_id}')}")
     chrome_options.add_extension(extension_path)
     chrome_options.add_extension(extension_path2)
-    user_agents = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:131.0) Gecko/20100101 Firefox/131.0"
-    ]
-    chrome_options.add_argument(f"user-agent={random.choice(user_agents)}")
+    chrome_options.add_argument(f"user-agent={random.choice(USER_AGENTS)}")
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option("useAutomationExtension", False)
 
+    global DRIVER_PATH
     try:
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=chrome_options
-        )
+        with driver_setup_lock:
+            if DRIVER_PATH is None:
+                DRIVER_PATH = ChromeDriverManager().install()
+            driver = webdriver.Chrome(
+                service=Service(DRIVER_PATH),
+                options=chrome_options
+            )
         driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
             "source": """
                 Object.defineProperty(navigator, 'webdriver', {
@@ -142,100 +240,239 @@ def initialize_driver(extension_path, extension_path2):
         logging.error(f"Error initializing WebDriver: {str(e)}")
         return None
 
-def scrape_google_emails(extension_path, extension_path2, locations):
+def driver_is_alive(driver):
     """
-    Scrape Google search results for emails using the provided USA locations.
-    Query: from:construction inurl:contact {location} email
+    Check whether the browser session still answers commands, so it can be reused instead of restarted.
     """
-    email_results = load_checkpoint()
-    driver = None
+    try:
+        driver.current_url
+        return True
+    except WebDriverException:
+        return False
+
+def wait_for_query_slot():
+    """
+    Block until this worker may query Google; queries from all HTTP and browser workers go out MIN_DELAY..MAX_DELAY apart.
+    """
+    global next_query_time
+    with query_lock:
+        now = time.monotonic()
+        wait = next_query_time - now
+        next_query_time = max(next_query_time, now) + random.uniform(MIN_DELAY, MAX_DELAY)
+    if wait > 0:
+        time.sleep(wait)  # The slot is already reserved, so other workers can queue up behind it meanwhile
 
+def fetch_serp_html(url):
+    """
+    Fetch a Google results page over plain HTTP.
+    Returns None if the request fails or the response is not a results page (a CAPTCHA, consent or
+    "turn on JavaScript" page), so the caller can fall back to the browser.
+    """
     try:
-        driver = initialize_driver(extension_path, extension_path2)
-        if not driver:
-            raise Exception("Failed to initialize WebDriver")
+        response = http_session.get(url, headers={"User-Agent": random.choice(USER_AGENTS)}, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logging.warning(f"HTTP fetch failed, falling back to browser: {str(e)}")
+        return None
+    if "Our systems have detected unusual traffic" in response.text:
+        logging.warning(f"CAPTCHA served over HTTP for {url}. Falling back to browser.")
+        return None
+    # Only a real results page has the results container; anything else must not be recorded as done
+    start = response.text.find('id="search"')
+    if start == -1:
+        logging.warning(f"No results container in the HTTP response for {url}. Falling back to browser.")
+        return None
+    # Skip the <head> and inline CSS/JS before the results container; they never hold result emails
+    return response.text[start:]
 
-        for location in locations:
-            if location in email_results:
-                logging.info(f"Skipping already processed location: {location}")
-                continue
+def cache_path(url):
+    """
+    Return the on-disk cache file for a results page URL.
+    """
+    return os.path.join(CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".html.gz")
 
-            query = f'from:construction inurl:contact "{location}" email'
-            logging.info(f"Searching: {query}")
-            encoded_query = urllib.parse.quote(query)
-            url = f"https://www.google.com/search?q={encoded_query}&num=50"
+def load_cached_html(url):
+    """
+    Return the cached HTML for a URL, or None if it was never fetched or is older than CACHE_TTL.
+    """
+    path = cache_path(url)
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_TTL:
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.error(f"Error reading cached page {path}: {str(e)}")
+        return None
 
+def save_cached_html(url, page_html):
+    """
+    Cache a fetched results page so retries and resumed runs do not query Google again.
+    """
+    path = cache_path(url)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+            f.write(page_html)
+        os.replace(path + ".tmp", path)  # Never leave a half-written cache entry behind
+    except Exception as e:
+        logging.error(f"Error caching page to {path}: {str(e)}")
+
+def fetch_location_html(location):
+    """
+    Fetch the results page for one location over HTTP. Runs in a worker thread.
+    Returns (location, url, page_html); page_html is None if the browser is needed.
+    """
+    query = QUERY_TEMPLATE.format(location)
+    logging.info(f"Searching: {query}")
+    url = GOOGLE_SEARCH_URL + urllib.parse.urlencode({"q": query, "num": 50})
+    page_html = load_cached_html(url)
+    if page_html is not None:
+        logging.info(f"Using cached results page for: {location}")
+        return location, url, page_html
+    wait_for_query_slot()
+    page_html = fetch_serp_html(url)
+    if page_html is not None:
+        save_cached_html(url, page_html)
+    return location, url, page_html
+
+def record_emails(email_results, location, page_html, seen_emails):
+    """
+    Extract emails from a results page, store the ones not already found for another location and checkpoint.
+    """
+    # Dedupe first (mailto links repeat addresses), then filter each distinct candidate once
+    candidates = set(EMAIL_RE.findall(page_html))
+    emails = {addr for addr in candidates if addr.rpartition(".")[2].lower() not in IMAGE_EXTENSIONS}
+    emails -= seen_emails
+    seen_emails.update(emails)
+    email_results[location] = sorted(list(emails))
+
+    logging.info(f"Found {len(emails)} new email(s) for: {location}")
+    for email in emails:
+        logging.info(email)
+
+    save_checkpoint(location, email_results[location])
+    append_to_csv(location, email_results[location])
+
+def scrape_in_browser(extension_path, extension_path2, assigned, worker_id, record):
+    """
+    Scrape the assigned (location, url) pairs in one browser, restarting it on fatal WebDriver errors.
+    Runs in a worker thread; record(location, page_html) stores each result.
+    """
+    driver = None
+    try:
+        for location, url in assigned:
             for attempt in range(MAX_RETRIES):
                 try:
+                    if not driver:
+                        driver = initialize_driver(extension_path, extension_path2, worker_id)
+                        if not driver:
+                            raise Exception("Failed to initialize WebDriver")
+                    wait_for_query_slot()
                     driver.get(url)
-                    WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "div#search"))
-                    )
-                    time.sleep(random.uniform(MIN_DELAY, MAX_DELAY))
-
-                    # Check for CAPTCHA
-                    if "Our systems have detected unusual traffic" in driver.page_source:
-                        logging.warning(f"CAPTCHA detected for {location}. Relying on Buster extension.")
-                        time.sleep(10)  # Give Buster time to solve
-
-                    # Scroll to load all results
-                    last_height = driver.execute_script("return document.body.scrollHeight")
-                    while True:
-                        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                        time.sleep(random.uniform(2, 4))
-                        new_height = driver.execute_script("return document.body.scrollHeight")
-                        if new_height == last_height:
-                            break
-                        last_height = new_height
-
-                    page_html = driver.page_source
-                    # Improved email regex
-                    emails = set(re.findall(
-                        r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(?!\.(png|jpg|jpeg|gif|bmp))',
-                        page_html,
-                        re.IGNORECASE
+                    # Wait for either the results or Google's CAPTCHA form, whichever renders first
+                    WebDriverWait(driver, 10, poll_frequency=POLL_INTERVAL).until(EC.any_of(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "div#search")),
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "form#captcha-form"))
                     ))
-                    email_results[location] = sorted(list(emails))
 
-                    logging.info(f"Found {len(emails)} email(s) for: {location}")
-                    for email in emails:
-                        logging.info(email)
+                    # Check for CAPTCHA; the page is only re-read if Buster had to change it
+                    page_html = driver.execute_script(SEARCH_RESULTS_JS)
+                    if "Our systems have detected unusual traffic" in page_html:
+                        logging.warning(f"CAPTCHA detected for {location}. Relying on Buster extension.")
+                        # Continue as soon as Buster gets through; a timeout is retried like a slow load
+                        WebDriverWait(driver, CAPTCHA_TIMEOUT, poll_frequency=POLL_INTERVAL).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "div#search"))
+                        )
+                        page_html = driver.execute_script(SEARCH_RESULTS_JS)
+                    if "Our systems have detected unusual traffic" not in page_html:
+                        save_cached_html(url, page_html)
 
-                    save_checkpoint(email_results)
-                    export_to_csv(email_results)
+                    record(location, page_html)
                     break  # Success, move to next location
 
                 except TimeoutException:
                     logging.error(f"Timeout loading search results for {location}. Attempt {attempt + 1}/{MAX_RETRIES}")
-                    if attempt == MAX_RETRIES - 1:
-                        logging.error(f"Max retries reached for {location}. Skipping.")
-                        email_results[location] = []
-                        save_checkpoint(email_results)
-                        export_to_csv(email_results)
-                    time.sleep(random.uniform(5, 10))
+                    if attempt < MAX_RETRIES - 1:
+                        time.sleep(random.uniform(5, 10))
                     continue
                 except WebDriverException as e:
-                    logging.error(f"WebDriver error for {location}: {e}")
+                    logging.error(f"WebDriver error for {location}. Attempt {attempt + 1}/{MAX_RETRIES}: {e}")
+                    if driver and driver_is_alive(driver):
+                        logging.info(f"WebDriver still responsive. Retrying {location} without a restart.")
+                        continue
                     if driver:
                         driver.quit()
-                    driver = initialize_driver(extension_path, extension_path2)
+                    driver = initialize_driver(extension_path, extension_path2, worker_id)
                     if not driver:
-                        logging.error(f"Failed to restart WebDriver. Saving results and exiting.")
-                        save_checkpoint(email_results)
-                        export_to_csv(email_results)
-                        return email_results
+                        logging.error(f"Failed to restart WebDriver {worker_id}. Stopping this browser worker.")
+                        return
                     logging.info(f"WebDriver restarted. Retrying {location}.")
                     continue
+            else:
+                logging.error(f"Skipped {location} after {MAX_RETRIES} attempts. Not recorded, so the next run tries it again.")
 
     except Exception as e:
-        logging.error(f"Error during scraping: {str(e)}")
-        save_checkpoint(email_results)
-        export_to_csv(email_results)
+        logging.error(f"Error in browser worker {worker_id}: {str(e)}")
 
     finally:
         if driver:
             driver.quit()
-            logging.info("Browser closed.")
+            logging.info(f"Browser {worker_id} closed.")
+
+def scrape_google_emails(extension_path, extension_path2, locations):
+    """
+    Scrape Google search results for emails using the provided USA locations.
+    Query: from:construction inurl:contact {location} email
+    Pages are fetched concurrently over HTTP (HTTP_WORKERS at a time); locations that Google
+    blocks are then split across BROWSER_WORKERS browsers, which are only started if needed.
+    """
+    email_results = load_checkpoint()
+    seen_emails = {email for emails in email_results.values() for email in emails}
+
+    try:
+        pending = []
+        for location in locations:
+            if location in email_results:
+                logging.info(f"Skipping already processed location: {location}")
+                continue
+            pending.append(location)
+
+        blocked = []
+        with ThreadPoolExecutor(max_workers=HTTP_WORKERS) as executor:
+            futures = [executor.submit(fetch_location_html, location) for location in pending]
+            try:
+                for future in as_completed(futures):
+                    location, url, page_html = future.result()
+                    if page_html is None:
+                        blocked.append((location, url))
+                        continue
+                    record_emails(email_results, location, page_html, seen_emails)
+            except BaseException:
+                # Leaving early (Ctrl+C or an error) must not let the queued locations keep querying Google
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+        if blocked:
+            logging.info(f"Retrying {len(blocked)} blocked location(s) in the browser.")
+            results_lock = threading.Lock()
+
+            def record(location, page_html):
+                with results_lock:  # Browser workers share the results, checkpoint and CSV
+                    record_emails(email_results, location, page_html, seen_emails)
+
+            workers = min(BROWSER_WORKERS, len(blocked))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for worker_id in range(workers):
+                    executor.submit(
+                        scrape_in_browser, extension_path, extension_path2,
+                        blocked[worker_id::workers], worker_id, record
+                    )
+
+    except Exception as e:
+        logging.error(f"Error during scraping: {str(e)}")
 
     return email_results
 
@@ -1,3 +1,5 @@
+import gzip
+import hashlib
 import json
 import re
 import time
@@ -5,16 +7,59 @@ import os
 import pandas as pd
 import random
 import logging
+import threading
 import urllib.parse
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import WebDriverException, TimeoutException
+
+try:
+    import orjson  # Faster checkpoint (de)serialization when installed
+except ImportError:
+    orjson = None
+
 # === CONFIGURATION ===
-MIN_DELAY = 5
+MIN_DELAY = 5  # Seconds between Google queries, across all workers
 MAX_DELAY = 8
-REAL_ESTATE_CHECKPOINT = "real_estate_emails.json"
-CONSTRUCTION_CHECKPOINT = "construction_emails.json"
+# One {"location", "emails"} record per line; the older .json dict checkpoints are imported once if present
+REAL_ESTATE_CHECKPOINT = "real_estate_emails.jsonl"
+CONSTRUCTION_CHECKPOINT = "construction_emails.jsonl"
+CACHE_DIR = "cache"  # Gzipped search pages keyed by SHA-1 of the URL
+CACHE_TTL = 7 * 24 * 3600  # Seconds before a cached page is fetched again
+# Persistent profiles reused across driver restarts; a subdirectory per script so they can run side by side
+CHROME_PROFILE_DIR = os.path.abspath(os.path.join("chrome_profile", "keyword001"))
+GOOGLE_SEARCH_URL = "https://www.google.com/search?"
+QUERY_TEMPLATE = '{keyword} in "{location}" inurl:/contact "email //@*.com"'
+MAX_RETRIES = 3  # Browser attempts per blocked location before it is left for the next run
+HTTP_TIMEOUT = 10
+CAPTCHA_TIMEOUT = 10  # Max wait for Buster to solve a CAPTCHA
+POLL_INTERVAL = 0.25  # How often browser waits re-check their condition
+HTTP_WORKERS = 8  # Concurrent HTTP fetches of search pages
+BROWSER_WORKERS = 2  # Browsers handling the locations Google blocked over HTTP
+USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) Apple_WebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:131.0) Gecko/20100101 Firefox/131.0"
+)
+# Linear-time email pattern: matches may only start at the beginning of a local-part run
+# (so long base64/JS blobs are not rescanned from every offset) and domain labels exclude
+# the dot, leaving no ambiguous split for the engine to backtrack over.
+EMAIL_RE = re.compile(
+    r'(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@(?:[A-Za-z0-9-]+\.)+[A-Za-z]{2,24}\b',
+    re.IGNORECASE
+)
+# Returns only the organic results subtree; falls back to the whole document (e.g. a CAPTCHA page)
+SEARCH_RESULTS_JS = (
+    "const results = document.querySelector('#search');"
+    "return results ? results.innerHTML : document.documentElement.outerHTML;"
+)
+IMAGE_EXTENSIONS = frozenset(("png", "jpg", "jpeg", "gif", "bmp"))
 
 # Setup logging
 logging.basicConfig(
@@ -23,6 +68,16 @@ logging.basicConfig(
     handlers=[logging.StreamHandler(), logging.FileHandler("scraper.log")]
 )
 
+# Shared HTTP session so search page fetches reuse pooled connections
+http_session = requests.Session()
+
+# Browsers start one at a time, so Selenium Manager never fetches the driver into its cache from two threads at once
+driver_setup_lock = threading.Lock()
+
+# Google query pacing shared by all worker threads: the earliest time the next query may go out
+query_lock = threading.Lock()
+next_query_time = 0.0
+
 def load_locations_from_excel(file_path):
     """
     Load locations from the Excel file:
@@ -35,16 +90,12 @@ def load_locations_from_excel(file_path):
         df = pd.read_excel(file_path)
 
         # Extract USA locations (column 4, 0-based index 3)
-        usa_locations = df.iloc[:, 3].dropna().str.strip()
-        usa_locations = [loc for loc in usa_locations if loc]
-        seen = set()
-        usa_locations = [loc for loc in usa_locations if not (loc in seen or seen.add(loc))]
+        usa_locations = df.iloc[:, 3].dropna().astype(str).str.strip()
+        usa_locations = usa_locations[usa_locations.ne("")].drop_duplicates().tolist()
 
         # Extract UK locations (column 7, 0-based index 6)
-        uk_locations = df.iloc[:, 6].dropna().str.strip()
-        uk_locations = [loc for loc in uk_locations if loc]
-        seen = set()
-        uk_locations = [loc for loc in uk_locations if not (loc in seen or seen.add(loc))]
+        uk_locations = df.iloc[:, 6].dropna().astype(str).str.strip()
+        uk_locations = uk_locations[uk_locations.ne("")].drop_duplicates().tolist()
 
         # Log counts
         logging.info(f"📍 Loaded {len(usa_locations)} unique USA locations from {file_path}")
@@ -60,40 +111,86 @@ def load_locations_from_excel(file_path):
         logging.error(f"❌ Error loading Excel file: {str(e)}")
         return []
 
+def import_legacy_checkpoint(checkpoint_file, legacy_file):
+    """
+    Convert an old JSON dict checkpoint into the JSON Lines checkpoint so runs started before the switch resume.
+    Only runs while the JSON Lines file does not exist yet.
+    """
+    if os.path.exists(checkpoint_file) or not os.path.exists(legacy_file):
+        return
+    try:
+        with open(legacy_file, "rb") as f:
+            content = f.read().strip()
+        old_results = (orjson.loads(content) if orjson else json.loads(content)) if content else {}
+        tmp_file = checkpoint_file + ".tmp"
+        with open(tmp_file, "wb") as f:
+            for location, emails in old_results.items():
+                record = {"location": location, "emails": emails}
+                f.write((orjson.dumps(record) if orjson else json.dumps(record).encode("utf-8")) + b"\n")
+        os.replace(tmp_file, checkpoint_file)  # A crash mid-import leaves no partial checkpoint to stop a retry
+        logging.info(f"📥 Imported {len(old_results)} location(s) from {legacy_file} into {checkpoint_file}")
+    except Exception as e:
+        logging.error(f"❌ Error importing old checkpoint {legacy_file}: {e}")
+
+def repair_checkpoint_tail(checkpoint_file):
+    """
+    Cut a record left unfinished by a crash off the end of the checkpoint file.
+    Otherwise the next append would land on the same line and both records would be unreadable.
+    """
+    with open(checkpoint_file, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return
+        f.seek(0)
+        f.truncate(f.read().rfind(b"\n") + 1)
+    logging.warning(f"⚠️ Dropped an unfinished record at the end of checkpoint file {checkpoint_file}")
+
 def load_checkpoint(checkpoint_file):
     """
-    Load existing results from the checkpoint file to resume scraping.
+    Load existing results from the JSON Lines checkpoint file to resume scraping.
+    Later records for the same location win; unreadable lines are skipped.
     """
+    import_legacy_checkpoint(checkpoint_file, os.path.splitext(checkpoint_file)[0] + ".json")
+    email_results = {}
     if os.path.exists(checkpoint_file):
         try:
-            with open(checkpoint_file, "r") as f:
-                content = f.read().strip()
-                if not content:
-                    logging.info(f"⚠️ Checkpoint file {checkpoint_file} is empty. Starting fresh.")
-                    return {}
-                return json.loads(content)
-        except json.JSONDecodeError as e:
-            logging.error(f"❌ Corrupted checkpoint file {checkpoint_file}: {e}. Starting fresh.")
-            return {}
+            repair_checkpoint_tail(checkpoint_file)
+            with open(checkpoint_file, "rb") as f:
+                for line_number, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = orjson.loads(line) if orjson else json.loads(line)
+                        email_results[record["location"]] = record["emails"]
+                    except (json.JSONDecodeError, KeyError, TypeError) as e:
+                        logging.error(f"❌ Skipping corrupted line {line_number} in checkpoint file {checkpoint_file}: {e}")
         except Exception as e:
             logging.error(f"❌ Error loading checkpoint file {checkpoint_file}: {e}")
             return {}
-    return {}
+        logging.info(f"📂 Loaded {len(email_results)} processed location(s) from {checkpoint_file}")
+    return email_results
 
-def save_checkpoint(email_results, checkpoint_file):
+def save_checkpoint(location, emails, checkpoint_file):
     """
-    Save current results to the checkpoint file.
+    Append the results for one location to the checkpoint file.
     """
     try:
-        with open(checkpoint_file, "w") as f:
-            json.dump(email_results, f, indent=4)
+        record = {"location": location, "emails": emails}
+        line = orjson.dumps(record) if orjson else json.dumps(record).encode("utf-8")
+        with open(checkpoint_file, "ab") as f:
+            f.write(line + b"\n")
         logging.info(f"💾 Checkpoint saved to: {checkpoint_file}")
     except Exception as e:
         logging.error(f"❌ Error saving checkpoint to {checkpoint_file}: {e}")
 
-def initialize_driver(extension_path, extension_path2):
+def initialize_driver(extension_path, extension_path2, worker_id=0):
     """
     Initialize the Chrome WebDriver with specified extensions.
+    Every browser worker uses its own profile directory, as Chrome locks a profile to one instance.
     """
     if not os.path.exists(extension_path):
         raise FileNotFoundError(f"Extension file not found at: {extension_path}")
@@ -102,95 +199,254 @@ def initialize_driver(extension_path, extension_path2):
 
     chrome_options = Options()
     chrome_options.add_argument("--start-maximized")
+    chrome_options.add_argument(f"--user-data-dir={os.path.join(CHROME_PROFILE_DIR, f'worker-{worker_id}')}")
     chrome_options.add_extension(extension_path)
     chrome_options.add_extension(extension_path2)
-    user_agents = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) Apple_WebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:131.0) Gecko/20100101 Firefox/131.0"
-    ]
-    chrome_options.add_argument(f"user-agent={random.choice(user_agents)}")
+    chrome_options.add_argument(f"user-agent={random.choice(USER_AGENTS)}")
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
 
     try:
-        driver = webdriver.Chrome(service=Service(), options=chrome_options)
+        with driver_setup_lock:
+            driver = webdriver.Chrome(service=Service(), options=chrome_options)
         return driver
     except Exception as e:
         logging.error(f"❌ Error initializing WebDriver: {str(e)}")
         return None
 
+def driver_is_alive(driver):
+    """
+    Check whether the browser session still responds, so it can be reused instead of restarted.
+    """
+    try:
+        driver.current_url
+        return True
+    except WebDriverException:
+        return False
+
+def wait_for_query_slot():
+    """
+    Block until this worker may query Google; queries from all HTTP and browser workers go out MIN_DELAY..MAX_DELAY apart.
+    """
+    global next_query_time
+    with query_lock:
+        now = time.monotonic()
+        wait = next_query_time - now
+        next_query_time = max(next_query_time, now) + random.uniform(MIN_DELAY, MAX_DELAY)
+    if wait > 0:
+        time.sleep(wait)  # The slot is already reserved, so other workers can queue up behind it meanwhile
+
+def fetch_serp_html(url):
+    """
+    Fetch a Google search page over plain HTTP.
+    Returns None on failure or when the response is not a results page (the "unusual traffic", consent or
+    "turn on JavaScript" page), so the browser can be used instead.
+    """
+    try:
+        response = http_session.get(url, headers={"User-Agent": random.choice(USER_AGENTS)}, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logging.warning(f"⚠️ HTTP fetch failed, falling back to browser: {e}")
+        return None
+    if "unusual traffic" in response.text:
+        logging.warning("⚠️ Google flagged unusual traffic over HTTP. Falling back to browser.")
+        return None
+    # Only a real results page has the results container; anything else must not be recorded as done
+    start = response.text.find('id="search"')
+    if start == -1:
+        logging.warning(f"⚠️ No results container in the HTTP response for {url}. Falling back to browser.")
+        return None
+    # Skip the <head> and inline CSS/JS before the results container; they never hold result emails
+    return response.text[start:]
+
+def cache_path(url):
+    """
+    Return the on-disk cache file for a results page URL.
+    """
+    return os.path.join(CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".html.gz")
+
+def load_cached_html(url):
+    """
+    Return the cached HTML for a URL, or None if it was never fetched or is older than CACHE_TTL.
+    """
+    path = cache_path(url)
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_TTL:
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.error(f"❌ Error reading cached page {path}: {e}")
+        return None
+
+def save_cached_html(url, page_html):
+    """
+    Cache a fetched results page so retries and resumed runs do not query Google again.
+    """
+    path = cache_path(url)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+            f.write(page_html)
+        os.replace(path + ".tmp", path)  # Never leave a half-written cache entry behind
+    except Exception as e:
+        logging.error(f"❌ Error caching page to {path}: {e}")
+
+def fetch_location_html(location, keyword, region_name):
+    """
+    Fetch the search page for one location over HTTP (runs in a worker thread).
+    Returns (location, url, page_html); page_html is None when the browser is needed.
+    """
+    # Construct the search query
+    query = QUERY_TEMPLATE.format(keyword=keyword, location=location)
+    logging.info(f"🔍 Searching: {query} ({region_name})")
+    # Properly encode the query for the URL
+    url = GOOGLE_SEARCH_URL + urllib.parse.urlencode({"q": query, "num": 50})
+    logging.info(f"🌐 Constructed URL: {url} ({region_name})")
+    page_html = load_cached_html(url)
+    if page_html is not None:
+        logging.info(f"🗂️ Using cached search page for: {location} ({region_name})")
+        return location, url, page_html
+    wait_for_query_slot()
+    page_html = fetch_serp_html(url)
+    if page_html is not None:
+        save_cached_html(url, page_html)
+    return location, url, page_html
+
+def record_emails(email_results, location, page_html, seen_emails, checkpoint_file, region_name):
+    """
+    Extract emails from a search page, keep those not already stored under another location and save the checkpoint.
+    """
+    # Dedupe first (mailto links repeat addresses), then filter each distinct candidate once
+    candidates = set(EMAIL_RE.findall(page_html))
+    emails = {addr for addr in candidates if addr.rpartition(".")[2].lower() not in IMAGE_EXTENSIONS}
+    emails -= seen_emails
+    seen_emails.update(emails)
+    email_results[location] = sorted(list(emails))
+
+    logging.info(f"📧 Found {len(emails)} new email(s) for: {location} ({region_name})")
+    for email in emails:
+        logging.info(f"  {email}")
+
+    save_checkpoint(location, email_results[location], checkpoint_file)
+
+def scrape_in_browser(extension_path, extension_path2, assigned, worker_id, record, region_name):
+    """
+    Scrape the assigned (location, url) pairs in one browser (runs in a worker thread).
+    Each page is handed to record(location, page_html).
+    """
+    driver = None
+    try:
+        for location, url in assigned:
+            for attempt in range(MAX_RETRIES):
+                try:
+                    if not driver:
+                        driver = initialize_driver(extension_path, extension_path2, worker_id)
+                        if not driver:
+                            raise Exception("Failed to initialize WebDriver")
+                    wait_for_query_slot()
+                    driver.get(url)
+                    # Wait for either the results or Google's CAPTCHA form, whichever renders first
+                    WebDriverWait(driver, 10, poll_frequency=POLL_INTERVAL).until(EC.any_of(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "div#search")),
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "form#captcha-form"))
+                    ))
+                    page_html = driver.execute_script(SEARCH_RESULTS_JS)
+                    if "unusual traffic" in page_html:
+                        logging.warning(f"🤖 CAPTCHA detected for {location} ({region_name}). Relying on Buster extension.")
+                        # Raises TimeoutException if Buster does not get through, so the CAPTCHA page is never recorded
+                        WebDriverWait(driver, CAPTCHA_TIMEOUT, poll_frequency=POLL_INTERVAL).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "div#search"))
+                        )
+                        page_html = driver.execute_script(SEARCH_RESULTS_JS)
+                    save_cached_html(url, page_html)
+                    record(location, page_html)
+                    break  # Success, move to the next location
+
+                except TimeoutException:
+                    logging.error(
+                        f"⏳ No results page for {location} ({region_name}): CAPTCHA unsolved or page too slow. "
+                        f"Attempt {attempt + 1}/{MAX_RETRIES}"
+                    )
+                except WebDriverException as e:
+                    logging.error(f"❌ WebDriver error for {location} ({region_name}). Attempt {attempt + 1}/{MAX_RETRIES}: {e}")
+                    if driver and driver_is_alive(driver):
+                        logging.info(f"♻️ WebDriver still responsive. Retrying {location} without a restart ({region_name}).")
+                        continue
+                    if driver:
+                        driver.quit()
+                    driver = initialize_driver(extension_path, extension_path2, worker_id)
+                    if not driver:
+                        logging.error(f"❌ Failed to restart WebDriver {worker_id}. Stopping this browser ({region_name}).")
+                        return
+                    logging.info(f"🔄 WebDriver restarted. Retrying {location} ({region_name}).")
+            else:
+                logging.error(
+                    f"⏭️ Skipped {location} ({region_name}) after {MAX_RETRIES} attempts. "
+                    "Not recorded, so the next run tries it again."
+                )
+
+    except Exception as e:
+        logging.error(f"❌ Error in browser {worker_id} ({region_name}): {e}")
+
+    finally:
+        if driver:
+            driver.quit()
+            logging.info(f"🛑 Browser {worker_id} closed ({region_name}).")
+
 def scrape_google_emails(extension_path, extension_path2, locations, keyword, checkpoint_file, region_name):
     """
     Scrape Google search results for emails using the provided locations and keyword.
     Uses the query: {keyword} in "{location}" inurl:/contact "email //@*.com"
+    Locations are fetched concurrently over HTTP; the ones Google blocks are split across BROWSER_WORKERS browsers.
     """
     email_results = load_checkpoint(checkpoint_file)
-    driver = None
+    # Emails already stored under any location, so each address is kept only once per checkpoint
+    seen_emails = {email for emails in email_results.values() for email in emails}
 
     try:
-        driver = initialize_driver(extension_path, extension_path2)
-        if not driver:
-            raise Exception("Failed to initialize WebDriver")
-
-        # Process each location
+        pending = []
         for location in locations:
             if location in email_results:
                 logging.info(f"⏭️ Skipping already processed location: {location} ({region_name})")
                 continue
+            pending.append(location)
 
-            # Construct the search query
-            query = f'{keyword} in "{location}" inurl:/contact "email //@*.com"'
-            logging.info(f"🔍 Searching: {query} ({region_name})")
-            # Properly encode the query for the URL
-            encoded_query = urllib.parse.quote(query)
-            url = f'https://www.google.com/search?q={encoded_query}&num=50'
-            logging.info(f"🌐 Constructed URL: {url} ({region_name})")
+        # Fetch every pending location over HTTP, HTTP_WORKERS at a time
+        blocked = []
+        with ThreadPoolExecutor(max_workers=HTTP_WORKERS) as executor:
+            futures = [executor.submit(fetch_location_html, location, keyword, region_name) for location in pending]
             try:
-                driver.get(url)
-                time.sleep(random.uniform(MIN_DELAY, MAX_DELAY))
-
-                # Scroll to load more results
-                last_height = driver.execute_script("return document.body.scrollHeight")
-                while True:
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(random.uniform(8, 12))
-                    new_height = driver.execute_script("return document.body.scrollHeight")
-                    if new_height == last_height:
-                        break
-                    last_height = new_height
-                    time.sleep(random.uniform(5, 7))
-
-                page_html = driver.page_source
-                # Improved email regex to exclude image formats
-                emails = set(re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.(?!png|jpg|jpeg)[a-zA-Z]{2,}', page_html))
-                email_results[location] = sorted(list(emails))
-
-                logging.info(f"📧 Found {len(emails)} email(s) for: {location} ({region_name})")
-                for email in emails:
-                    logging.info(f"  {email}")
-
-                save_checkpoint(email_results, checkpoint_file)
-
-            except WebDriverException as e:
-                logging.error(f"❌ WebDriver error for {location} ({region_name}): {e}")
-                if driver:
-                    driver.quit()
-                driver = initialize_driver(extension_path, extension_path2)
-                if not driver:
-                    logging.error(f"❌ Failed to restart WebDriver. Saving current results and exiting ({region_name}).")
-                    save_checkpoint(email_results, checkpoint_file)
-                    return email_results
-                logging.info(f"🔄 WebDriver restarted. Retrying {location} ({region_name}).")
-                continue
+                for future in as_completed(futures):
+                    location, url, page_html = future.result()
+                    if page_html is None:
+                        blocked.append((location, url))
+                        continue
+                    record_emails(email_results, location, page_html, seen_emails, checkpoint_file, region_name)
+            except BaseException:
+                # Leaving early (Ctrl+C or an error) must not let the queued locations keep querying Google
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+        # Fall back to browsers for locations Google blocked
+        if blocked:
+            results_lock = threading.Lock()
+
+            def record(location, page_html):
+                with results_lock:  # Browsers share the results dict and checkpoint file
+                    record_emails(email_results, location, page_html, seen_emails, checkpoint_file, region_name)
+
+            workers = min(BROWSER_WORKERS, len(blocked))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for worker_id in range(workers):
+                    executor.submit(
+                        scrape_in_browser, extension_path, extension_path2,
+                        blocked[worker_id::workers], worker_id, record, region_name
+                    )
 
     except Exception as e:
         logging.error(f"❌ Error during scraping ({region_name}): {e}")
-        save_checkpoint(email_results, checkpoint_file)
-
-    finally:
-        if driver:
-            driver.quit()
-            logging.info(f"🛑 Browser closed ({region_name}).")
 
     return email_results
 
@@ -4,9 +4,21 @@ import re
 import csv
 import json
 import random
+import html
 import logging
+import logging.handlers
 import urllib.parse
 import os
+import argparse
+import ast
+import itertools
+import queue
+import sqlite3
+import gzip
+import hashlib
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -15,29 +27,85 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException, TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+from selectolax.parser import HTMLParser
+
+try:
+    import orjson  # Faster checkpoint (de)serialization when installed
+except ImportError:
+    orjson = None
 
 # === CONFIGURATION ===
-MIN_DELAY = 5
+MIN_DELAY = 5  # Seconds between Google queries, across all workers
 MAX_DELAY = 8
-CHECKPOINT_FILE = "emails_result.json"
+CHECKPOINT_DB = "emails_result.db"  # SQLite store, one row per (keyword, city) pair
+LEGACY_CHECKPOINT_FILE = "emails_result.json"  # Older JSON checkpoint, imported once if present
 CSV_OUTPUT_FILE = "scraped_emails.csv"
 MAX_RETRIES = 3
+EXPORT_EVERY = 100  # Also rewrite the CSV every this many pairs, on top of the export at the end of the run
+GOOGLE_SEARCH_URL = "https://www.google.com/search?"
+QUERY_TEMPLATE = '{keyword} inurl:contact "{city}"'
 MAX_LINKS_PER_PAGE = 5  # Limit links to visit per search page
 PAGE_LOAD_TIMEOUT = 15  # Timeout for page loading
-DYNAMIC_WAIT = 3  # Wait for dynamic content
+DYNAMIC_WAIT = 3  # Longest wait for dynamic content once a page has loaded
+# Rendered content we wait for on JavaScript pages instead of sleeping the full DYNAMIC_WAIT
+CONTENT_SENTINEL = 'a[href^="mailto:"], footer'
+# Checked in the browser so the page HTML is not serialized into Python just for a substring test
+CAPTCHA_PROBE_JS = "return !!document.body && document.body.innerText.includes('unusual traffic');"
+# The rendered text of a browser-visited page, read in one call instead of serializing and re-parsing its HTML
+PAGE_TEXT_JS = "return document.body ? document.body.innerText : '';"
+DEFAULT_WORKERS = 4  # Parallel Chrome drivers (override with --workers)
+HTTP_TIMEOUT = 10  # Timeout for plain HTTP fetches of result links
+# Emails are always in the page text, so the browser skips downloading images, fonts and video
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm"
+]
+CHROMEDRIVER_VERSION = "136.0.7103.114"
+# Persistent per-worker profiles reused across driver restarts; a subdirectory per script so they can run side by side
+CHROME_PROFILE_DIR = os.path.abspath(os.path.join("chrome_profile", "loc"))
+CACHE_DIR = "cache"  # Gzipped pages keyed by SHA-1 of the URL
+CACHE_TTL = 7 * 24 * 3600  # Seconds before a cached page is fetched again
+JS_PAGE_MIN_TEXT = 200  # Pages with <noscript> and less server-rendered text than this need the browser
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:131.0) Gecko/20100101 Firefox/131.0"
+]
+# Linear-time scan: matches only start at the beginning of a local-part run and domain
+# labels exclude the dot, so long tokens are never re-walked from every offset
+EMAIL_RE = re.compile(
+    r'(?<![a-zA-Z0-9._%+-])[a-zA-Z0-9._%+-]+@(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,24}\b',
+    re.IGNORECASE
+)
+# Image file names such as logo@2x.png match the pattern; they are dropped after matching
+IMAGE_EXTENSIONS = frozenset(('png', 'jpg', 'jpeg', 'gif', 'bmp', 'svg', 'webp'))
 
-# Set up logging
+# Set up logging: worker threads only enqueue records; a background listener formats and writes them
+console_handler = logging.StreamHandler()
+console_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s", datefmt="%H:%M:%S"))
+# scraper.log is shared with the other scripts, so it keeps their full date-and-time stamps
+file_handler = logging.FileHandler("scraper.log", encoding="utf-8")
+file_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+log_handlers = [console_handler, file_handler]
+log_queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(log_queue, *log_handlers)
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("scraper.log", encoding="utf-8")
-    ]
+    format="%(message)s",  # The listener's handlers add the timestamp and level
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
 logger = logging.getLogger(__name__)
 
+# Shared HTTP session so contact page fetches reuse pooled connections
+http_session = requests.Session()
+
+# Google query pacing shared by all worker threads: the earliest time the next query may go out
+query_lock = threading.Lock()
+next_query_time = 0.0
+
+# Resolved on the first driver setup; restarts reuse it instead of asking webdriver_manager again
+DRIVER_PATH = None
+
 def load_cities_and_keywords(excel_path, sheet_name="Sheet1"):
     """Load USA and UK cities and keywords from the Excel file."""
     try:
@@ -59,64 +127,110 @@ def load_cities_and_keywords(excel_path, sheet_name="Sheet1"):
         logger.error(f"Error reading Excel file {excel_path}: {e}")
         return [], [], []
 
-def load_checkpoint(checkpoint_file=CHECKPOINT_FILE):
-    """Load existing results from the checkpoint file."""
-    if os.path.exists(checkpoint_file):
-        try:
-            with open(checkpoint_file, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if not content:
-                    logger.info(f"Checkpoint file {checkpoint_file} is empty. Starting fresh.")
-                    return {}
-                return json.loads(content)
-        except json.JSONDecodeError as e:
-            logger.error(f"Corrupted checkpoint file {checkpoint_file}: {e}. Starting fresh.")
-            return {}
-        except Exception as e:
-            logger.error(f"Error loading checkpoint file {checkpoint_file}: {e}")
-            return {}
-    return {}
-
-def save_checkpoint(email_results, checkpoint_file=CHECKPOINT_FILE):
-    """Save current results to the checkpoint file."""
+def open_checkpoint(db_path=CHECKPOINT_DB):
+    """Open the checkpoint database in WAL mode, creating the results table on first use."""
+    db = sqlite3.connect(db_path, isolation_level=None)  # Autocommit: every saved pair is durable at once
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS results ("
+        "keyword TEXT NOT NULL, city TEXT NOT NULL, emails TEXT NOT NULL, PRIMARY KEY (keyword, city))"
+    )
+    return db
+
+def parse_legacy_key(key):
+    """Split an old JSON checkpoint key into (keyword, city), or return None if it is neither known format."""
+    if "||" in key:
+        keyword, _, city = key.partition("||")
+        return keyword, city
     try:
-        with open(checkpoint_file, "w", encoding="utf-8") as f:
-            json.dump(email_results, f, indent=4)
-        logger.info(f"Checkpoint saved to: {checkpoint_file}")
+        pair = ast.literal_eval(key)  # The original script keyed pairs by str((keyword, city))
+    except (ValueError, SyntaxError):
+        return None
+    if isinstance(pair, tuple) and len(pair) == 2 and all(isinstance(part, str) for part in pair):
+        return pair
+    return None
+
+def import_legacy_checkpoint(db, checkpoint_file=LEGACY_CHECKPOINT_FILE):
+    """Copy results from the old JSON checkpoint into an empty database so a resumed run skips them."""
+    if not os.path.exists(checkpoint_file) or db.execute("SELECT 1 FROM results LIMIT 1").fetchone():
+        return
+    try:
+        with open(checkpoint_file, "rb") as f:
+            content = f.read().strip()
+        old_results = (orjson.loads(content) if orjson else json.loads(content)) if content else {}
+        imported = 0
+        with db:  # One transaction for the whole import
+            db.execute("BEGIN")
+            for key, emails in old_results.items():
+                pair = parse_legacy_key(key)
+                if pair is None:
+                    logger.warning(f"Skipping unrecognised key {key!r} in {checkpoint_file}")
+                    continue
+                db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (*pair, json.dumps(emails)))
+                imported += 1
+        logger.info(f"Imported {imported} pairs from {checkpoint_file}")
+    except Exception as e:
+        logger.error(f"Error importing old checkpoint {checkpoint_file}: {e}")
+
+def load_checkpoint(db_path=CHECKPOINT_DB):
+    """Load existing results from the checkpoint database, keyed by (keyword, city)."""
+    try:
+        db = open_checkpoint(db_path)
+        try:
+            import_legacy_checkpoint(db)
+            rows = db.execute("SELECT keyword, city, emails FROM results").fetchall()
+        finally:
+            db.close()
+        loads = orjson.loads if orjson else json.loads
+        return {(keyword, city): loads(emails) for keyword, city, emails in rows}
     except Exception as e:
-        logger.error(f"Error saving checkpoint to {checkpoint_file}: {e}")
+        logger.error(f"Error loading checkpoint database {db_path}: {e}")
+        return {}
+
+def save_checkpoint(db, keyword, city, emails):
+    """Upsert one pair's emails; earlier pairs are never rewritten."""
+    try:
+        encoded = orjson.dumps(emails).decode() if orjson else json.dumps(emails)
+        db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (keyword, city, encoded))
+    except sqlite3.Error as e:
+        logger.error(f"Error saving checkpoint for {keyword} in {city}: {e}")
 
 def export_to_csv(email_results, csv_file=CSV_OUTPUT_FILE):
     """Export email results to a CSV file."""
     try:
-        data = [
-            {"Keyword": keyword, "City": city, "Email": email}
-            for (keyword, city), emails in email_results.items()
-            for email in emails if email  # Exclude empty strings
-        ]
-        df = pd.DataFrame(data)
-        df.to_csv(csv_file, index=False, encoding="utf-8")
+        keywords, cities, emails_col = [], [], []
+        for (keyword, city), emails in email_results.items():
+            for email in emails:
+                if email:  # Exclude empty strings
+                    keywords.append(keyword)
+                    cities.append(city)
+                    emails_col.append(email)
+        # Plain csv.writer: no per-row dicts and no DataFrame just to write three columns
+        with open(csv_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Keyword", "City", "Email"])
+            writer.writerows(zip(keywords, cities, emails_col))
         logger.info(f"Results exported to: {csv_file}")
     except Exception as e:
         logger.error(f"Error exporting to CSV {csv_file}: {e}")
 
-def setup_driver(extension_paths):
-    """Set up Chrome driver with extensions."""
+def setup_driver(extension_paths, worker_id=0):
+    """Set up Chrome driver with extensions, using a persistent profile for this worker."""
+    global DRIVER_PATH
     try:
         chrome_options = Options()
         chrome_options.add_argument("--headless=new")  # Run in headless mode
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--start-maximized")
-        user_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:131.0) Gecko/20100101 Firefox/131.0"
-        ]
-        chrome_options.add_argument(f"user-agent={random.choice(user_agents)}")
+        # Chrome locks a profile to one instance, so each pooled driver gets its own
+        chrome_options.add_argument(f"--user-data-dir={os.path.join(CHROME_PROFILE_DIR, f'worker-{worker_id}')}")
+        chrome_options.add_argument("--profile-directory=Default")
+        chrome_options.add_argument(f"user-agent={random.choice(USER_AGENTS)}")
         chrome_options.add_argument("--disable-blink-features=AutomationControlled")
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option("useAutomationExtension", False)
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
         
         for ext_path in extension_paths:
             if not os.path.exists(ext_path):
@@ -125,8 +239,10 @@ def setup_driver(extension_paths):
             logger.info(f"Loading extension: {ext_path}")
             chrome_options.add_extension(ext_path)
         
+        if DRIVER_PATH is None:
+            DRIVER_PATH = ChromeDriverManager(driver_version=CHROMEDRIVER_VERSION).install()
         driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager(driver_version="136.0.7103.114").install()),
+            service=Service(DRIVER_PATH),
             options=chrome_options
         )
         driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
@@ -136,78 +252,167 @@ def setup_driver(extension_paths):
                 })
             """
         })
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
         logger.info("ChromeDriver initialized successfully")
         return driver
     except Exception as e:
         logger.error(f"Error setting up driver: {e}")
         return None
 
+def cache_path(url):
+    """Return the on-disk cache file for a page URL."""
+    return os.path.join(CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".html.gz")
+
+def load_cached_html(url):
+    """Return the cached HTML for a URL, or None if it was never fetched or is older than CACHE_TTL."""
+    path = cache_path(url)
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_TTL:
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"Error reading cached page {path}: {e}")
+        return None
+
+def save_cached_html(url, page_html):
+    """Cache a fetched page so resumed runs and extractor changes can reuse it without refetching."""
+    path = cache_path(url)
+    tmp_file = f"{path}.{threading.get_ident()}.tmp"  # Workers may fetch the same link at once
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with gzip.open(tmp_file, "wt", encoding="utf-8") as f:
+            f.write(page_html)
+        os.replace(tmp_file, path)  # Never leave a half-written cache entry behind
+    except Exception as e:
+        logger.error(f"Error caching page to {path}: {e}")
+
+def visible_text(tree):
+    """Return the visible text of a parsed page, space-separated."""
+    # Scripts and styles never hold visible addresses and can be most of the page
+    for tag in tree.css('script, style, noscript'):
+        tag.decompose()
+    return tree.body.text(separator=' ', strip=True) if tree.body else ''
+
+def html_to_text(page_html):
+    """Return the visible text of an HTML page, using selectolax's C parser."""
+    return visible_text(HTMLParser(page_html))
+
+def parse_results_page(page_html):
+    """Parse a Google results page once and return (page_text, result_links)."""
+    tree = HTMLParser(page_html)
+    hrefs = (a.attributes.get('href') for a in tree.css('div.yuRUbf a'))
+    links = list(dict.fromkeys(href for href in hrefs if href and href.startswith('http')))
+    return visible_text(tree), links
+
 def extract_emails(text):
     """Extract email addresses from text using regex."""
-    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(?!\.(png|jpg|jpeg|gif|bmp|svg|webp))'
-    emails = set(re.findall(email_pattern, text, re.IGNORECASE))
-    # Filter out invalid emails
-    valid_emails = {email for email in emails if len(email) > 5 and '@' in email and '.' in email.split('@')[1]}
+    emails = set(EMAIL_RE.findall(text))
+    # Filter out invalid emails; the pattern already guarantees an '@' and a dotted domain, so only length and image names need checking
+    valid_emails = {email for email in emails if len(email) > 5 and email.rpartition('.')[2].lower() not in IMAGE_EXTENSIONS}
     return valid_emails
 
+def wait_for_query_slot():
+    """Block until this worker may query Google; queries from all workers go out MIN_DELAY..MAX_DELAY apart."""
+    global next_query_time
+    with query_lock:
+        now = time.monotonic()
+        wait = next_query_time - now
+        next_query_time = max(next_query_time, now) + random.uniform(MIN_DELAY, MAX_DELAY)
+    if wait > 0:
+        time.sleep(wait)  # The slot is already reserved, so other workers can queue up behind it meanwhile
+
+def scrape_link_http(link):
+    """Fetch a result link over HTTP and extract its emails.
+
+    Returns (link, emails, needs_browser); needs_browser is True when the fetch failed or the
+    page looks JavaScript-rendered (no emails, a <noscript> tag and little server-rendered text).
+    """
+    page_html = load_cached_html(link)
+    fetched = page_html is None
+    if fetched:
+        try:
+            response = http_session.get(link, headers={"User-Agent": random.choice(USER_AGENTS)}, timeout=HTTP_TIMEOUT)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f"HTTP fetch failed for {link}, using browser: {e}")
+            return link, set(), True
+        page_html = response.text
+    page_text = html_to_text(page_html)
+    page_emails = extract_emails(page_text)
+    needs_browser = not page_emails and "<noscript" in page_html.lower() and len(page_text) < JS_PAGE_MIN_TEXT
+    if fetched and not needs_browser:
+        save_cached_html(link, page_html)
+    return link, page_emails, needs_browser
+
 def scrape_emails(driver, query):
     """Scrape emails from Google search results and contact pages."""
     emails = set()
     try:
-        encoded_query = urllib.parse.quote(query)
-        search_url = f"https://www.google.com/search?q={encoded_query}&num=50"
-        driver.get(search_url)
-        WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div#search"))
-        )
-        time.sleep(random.uniform(MIN_DELAY, MAX_DELAY))
+        search_url = GOOGLE_SEARCH_URL + urllib.parse.urlencode({"q": query, "num": 50})
+        page_html = load_cached_html(search_url)
+        if page_html is not None:
+            logger.info(f"Using cached search results for query: {query}")
+        else:
+            wait_for_query_slot()
+            driver.get(search_url)
+            WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div#search"))
+            )
+            
+            # Check for CAPTCHA
+            captcha = driver.execute_script(CAPTCHA_PROBE_JS)
+            if captcha:
+                logger.warning(f"CAPTCHA detected for query: {query}. Relying on Buster extension.")
+                time.sleep(10)  # Give Buster time to solve
+                captcha = driver.execute_script(CAPTCHA_PROBE_JS)
+            page_html = driver.page_source
+            if not captcha:  # Never cache the CAPTCHA page in place of the results
+                save_cached_html(search_url, page_html)
         
-        # Check for CAPTCHA
-        if "Our systems have detected unusual traffic" in driver.page_source:
-            logger.warning(f"CAPTCHA detected for query: {query}. Relying on Buster extension.")
-            time.sleep(10)  # Give Buster time to solve
-        
-        # Extract emails from search results page
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        page_text = soup.get_text(separator=' ', strip=True)
+        # Extract emails and result links from a single parse of the search results page
+        page_text, links = parse_results_page(page_html)
         page_emails = extract_emails(page_text)
         emails.update(page_emails)
         logger.info(f"Extracted {len(page_emails)} emails from search results page for query: {query}")
-        
-        # Get search result links
-        results = WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, 'div.yuRUbf a'))
-        )
-        links = [result.get_attribute('href') for result in results if result.get_attribute('href') and 'http' in result.get_attribute('href')]
         logger.info(f"Found {len(links)} valid links for query: {query}")
         
-        # Visit each link to scrape emails
-        original_window = driver.current_window_handle
-        for link in links[:MAX_LINKS_PER_PAGE]:
+        # Fetch the links concurrently over HTTP; only failed or JavaScript-rendered pages go to the browser
+        browser_links = []
+        with ThreadPoolExecutor(max_workers=MAX_LINKS_PER_PAGE) as executor:
+            for link, page_emails, needs_browser in executor.map(scrape_link_http, links[:MAX_LINKS_PER_PAGE]):
+                if needs_browser:
+                    browser_links.append(link)
+                    continue
+                emails.update(page_emails)
+                logger.debug(f"Extracted {len(page_emails)} emails from {link}")
+        
+        # Visit the remaining links in the browser, one after another in the same tab
+        for link in browser_links:
             try:
-                driver.execute_script(f"window.open('{link}');")
-                driver.switch_to.window(driver.window_handles[-1])
+                driver.get(link)
                 WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
                     EC.presence_of_element_located((By.TAG_NAME, 'body'))
                 )
-                time.sleep(DYNAMIC_WAIT)  # Wait for dynamic content
+                try:
+                    # Stop as soon as the rendered content shows up rather than always sleeping
+                    WebDriverWait(driver, DYNAMIC_WAIT).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, CONTENT_SENTINEL))
+                    )
+                except TimeoutException:
+                    pass  # No sentinel on this page; scrape whatever has rendered
                 
-                # Parse page with BeautifulSoup
-                soup = BeautifulSoup(driver.page_source, 'html.parser')
-                page_text = soup.get_text(separator=' ', strip=True)
+                page_text = driver.execute_script(PAGE_TEXT_JS)
+                # Cache the rendered text as a minimal page, so a resumed run reads it without the browser
+                save_cached_html(link, f"<html><body>{html.escape(page_text)}</body></html>")
                 page_emails = extract_emails(page_text)
                 emails.update(page_emails)
-                logger.info(f"Extracted {len(page_emails)} emails from {link}")
-                
-                driver.close()
-                driver.switch_to.window(original_window)
+                logger.debug(f"Extracted {len(page_emails)} emails from {link}")
             except Exception as e:
                 logger.error(f"Error scraping link {link}: {e}")
-                try:
-                    driver.close()
-                except:
-                    pass
-                driver.switch_to.window(original_window)
                 continue
         
         logger.info(f"Total emails found for query '{query}': {len(emails)}")
@@ -219,7 +424,46 @@ def scrape_emails(driver, query):
         logger.error(f"Error scraping emails for query '{query}': {e}")
         return set()
 
+def scrape_pair(driver_pool, extension_paths, keyword, city):
+    """Scrape one (keyword, city) pair with a driver borrowed from the pool; runs in a worker thread."""
+    worker_id, driver = driver_pool.get()
+    try:
+        if driver is None:  # A previous restart failed; try to bring this slot back
+            driver = setup_driver(extension_paths, worker_id)
+            if not driver:
+                raise RuntimeError("Failed to restart WebDriver")
+
+        logger.info(f"Scraping emails for keyword: {keyword}, city: {city}")
+        query = QUERY_TEMPLATE.format(keyword=keyword, city=city)
+        emails = set()
+        for attempt in range(MAX_RETRIES):
+            try:
+                emails = scrape_emails(driver, query)
+                break
+            except WebDriverException:
+                logger.error(f"WebDriver error for {keyword} in {city}. Attempt {attempt + 1}/{MAX_RETRIES}")
+                driver.quit()
+                driver = setup_driver(extension_paths, worker_id)
+                if not driver:
+                    raise RuntimeError("Failed to restart WebDriver")
+                logger.info("WebDriver restarted.")
+
+        return keyword, city, emails
+    finally:
+        driver_pool.put((worker_id, driver))  # Always return the slot so other workers never block on an empty pool
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
 def main():
+    parser = argparse.ArgumentParser(description="Scrape contact emails from Google for keyword/city pairs.")
+    parser.add_argument("--workers", type=positive_int, default=DEFAULT_WORKERS, help="Number of parallel Chrome drivers")
+    args = parser.parse_args()
+
     # Configuration
     excel_path = r"D:\Emails\data\country.xlsx"
     extension_paths = [
@@ -244,44 +488,65 @@ def main():
     # Load checkpoint
     email_results = load_checkpoint()
     
-    # Set up driver
-    driver = setup_driver(extension_paths)
-    if not driver:
-        logger.error("Driver setup failed. Exiting.")
+    # Limit for testing: 1 keyword, 5 cities
+    pending = [
+        (keyword, city) for keyword, city in itertools.product(keywords[:1], all_cities[:5])
+        if (keyword, city) not in email_results
+    ]
+    logger.info(f"{len(pending)} keyword/city pair(s) left to scrape")
+    if not pending:
+        logger.info("Nothing to scrape; all pairs are already in the checkpoint.")
         return
+    workers = min(args.workers, len(pending))
     
+    # Set up a pool of (worker_id, driver) slots shared by the worker threads
+    driver_pool = queue.Queue()
+    for worker_id in range(workers):
+        driver = setup_driver(extension_paths, worker_id)
+        if not driver:
+            logger.error("Driver setup failed. Exiting.")
+            while not driver_pool.empty():
+                driver_pool.get_nowait()[1].quit()
+            return
+        driver_pool.put((worker_id, driver))
+    
+    checkpoint_db = open_checkpoint()
+    scraped = 0
+
+    def store(keyword, city, emails):
+        """Merge and checkpoint one scraped pair; only ever called on the main thread."""
+        nonlocal scraped
+        email_results[(keyword, city)] = sorted(emails)
+        save_checkpoint(checkpoint_db, keyword, city, email_results[(keyword, city)])
+        scraped += 1
+        if scraped % EXPORT_EVERY == 0:  # The CSV is only for people; the database is the durable state
+            export_to_csv(email_results)
+
     try:
-        # Limit for testing
-        for keyword in keywords[:1]:  # Test with 1 keyword
-            for city in all_cities[:5]:  # Test with 5 cities
-                key = (keyword, city)
-                if str(key) in email_results:
-                    logger.info(f"Skipping already processed: {keyword} in {city}")
-                    continue
-                
-                logger.info(f"Scraping emails for keyword: {keyword}, city: {city}")
-                query = f'{keyword} inurl:contact "{city}"'
-                emails = set()
-                for attempt in range(MAX_RETRIES):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(scrape_pair, driver_pool, extension_paths, keyword, city) for keyword, city in pending]
+            handled = set()
+            try:
+                for future in as_completed(futures):
+                    handled.add(future)
                     try:
-                        emails = scrape_emails(driver, query)
+                        keyword, city, emails = future.result()
+                    except RuntimeError as e:
+                        logger.error(f"{e}. Saving and exiting.")
                         break
-                    except WebDriverException:
-                        logger.error(f"WebDriver error for {keyword} in {city}. Attempt {attempt + 1}/{MAX_RETRIES}")
-                        driver.quit()
-                        driver = setup_driver(extension_paths)
-                        if not driver:
-                            logger.error("Failed to restart WebDriver. Saving and exiting.")
-                            save_checkpoint(email_results)
-                            export_to_csv(email_results)
-                            return
-                        logger.info("WebDriver restarted.")
-                
-                email_results[str(key)] = sorted(list(emails))
-                save_checkpoint(email_results)
-                export_to_csv(email_results)
-                
-                time.sleep(random.uniform(MIN_DELAY, MAX_DELAY))
+                    store(keyword, city, emails)
+            finally:
+                # Stop queued pairs from starting (also on Ctrl+C), then keep the results of those already running
+                executor.shutdown(wait=False, cancel_futures=True)
+                for future in futures:
+                    if future in handled or future.cancelled():
+                        continue
+                    try:
+                        keyword, city, emails = future.result()
+                    except Exception as e:  # Never mask why the loop stopped
+                        logger.error(f"Pair failed while shutting down: {e}")
+                        continue
+                    store(keyword, city, emails)
         
         logger.info(f"Scraping complete. Total emails found: {sum(len(emails) for emails in email_results.values())}")
     
@@ -289,8 +554,18 @@ def main():
         logger.error(f"Error in main loop: {e}")
     
     finally:
-        driver.quit()
-        logger.info("Browser closed.")
+        checkpoint_db.close()
+        if scraped % EXPORT_EVERY:
+            export_to_csv(email_results)
+        while not driver_pool.empty():
+            _, driver = driver_pool.get_nowait()
+            if driver:
+                driver.quit()
+        logger.info("Browsers closed.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    log_listener.start()
+    try:
+        main()
+    finally:
+        log_listener.stop()  # Flush any queued records before exiting